@@ -1,7 +1,7 @@
 """Database setup helpers for backend and worker."""
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 Base = declarative_base()
@@ -17,3 +17,27 @@ def make_session_factory(engine):
 
 def get_session_local(session_factory) -> Session:
     return session_factory()
+
+
+def add_missing_columns(engine, metadata) -> list[str]:
+    """Add model columns missing from existing tables; `create_all` only creates whole tables.
+
+    New columns are added as nullable, so existing rows read back as NULL.
+    """
+    added = []
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            have = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in have:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+                added.append(f"{table.name}.{column.name}")
+            if any(name.startswith(f"{table.name}.") for name in added):
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+    return added
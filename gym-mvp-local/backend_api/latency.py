@@ -0,0 +1,75 @@
+"""Per-stage latency histograms from the stage timestamps stamped on each event."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable
+
+from shared.schemas import LATENCY_STAGES
+
+BUCKETS_S = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0]
+
+
+def stage_deltas(stage_ts: dict[str, float]) -> dict[str, float]:
+    """Seconds spent reaching each stage from the previous stamped one, plus `end_to_end`.
+
+    Deltas are not clamped: a negative one means clock skew between the machines that stamped it.
+    """
+    deltas: dict[str, float] = {}
+    prev = None
+    for stage in LATENCY_STAGES:
+        ts = stage_ts.get(stage)
+        if ts is None:
+            continue
+        if prev is not None:
+            deltas[stage] = ts - prev
+        prev = ts
+    first = stage_ts.get(LATENCY_STAGES[0])
+    if first is not None and prev is not None and prev != first:
+        deltas["end_to_end"] = prev - first
+    return deltas
+
+
+def _histogram(values: list[float]) -> dict:
+    """Percentiles over all deltas; negative ones are counted apart from the histogram buckets."""
+    ordered = sorted(values)
+    counts = [0] * (len(BUCKETS_S) + 1)
+    negative = 0
+    for v in ordered:
+        if v < 0:
+            negative += 1
+        else:
+            counts[bisect_left(BUCKETS_S, v)] += 1
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 4)
+
+    return {
+        "count": len(ordered),
+        "negative": negative,
+        "p50_s": pct(0.50),
+        "p99_s": pct(0.99),
+        "max_s": round(ordered[-1], 4),
+        "histogram": counts,
+    }
+
+
+def latency_stats(rows: Iterable[tuple[str, dict | None]]) -> dict:
+    """Aggregate `(camera_id, stage_ts)` rows into histograms per stage, overall and per camera."""
+    overall: dict[str, list[float]] = defaultdict(list)
+    per_camera: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+    for camera_id, stage_ts in rows:
+        for stage, delta in stage_deltas(stage_ts or {}).items():
+            overall[stage].append(delta)
+            per_camera[camera_id][stage].append(delta)
+
+    order = LATENCY_STAGES + ["end_to_end"]
+
+    def summarize(values: dict[str, list[float]]) -> dict:
+        return {stage: _histogram(values[stage]) for stage in order if values.get(stage)}
+
+    return {
+        "buckets_s": BUCKETS_S,
+        "stages": summarize(overall),
+        "cameras": {cam: summarize(values) for cam, values in sorted(per_camera.items())},
+    }
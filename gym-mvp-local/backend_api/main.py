@@ -2,25 +2,36 @@
 from __future__ import annotations
 
 import argparse
+import csv
+import io
+import json
+import os
 import sys
 from pathlib import Path
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse
-from sqlalchemy import select
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import or_, select
 from sqlalchemy.exc import IntegrityError
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from backend_api.db import get_session_local, make_engine, make_session_factory
+from backend_api.db import add_missing_columns, get_session_local, make_engine, make_session_factory
+from backend_api.latency import latency_stats
+from backend_api.media_pipeline import MediaPipeline
+from backend_api.media_store import SHA256_PATTERN, MediaStore
 from backend_api.models import Base, Event, Media
 from shared.schemas import EventPayload
+from shared.utils import utc_ts
 
 app = FastAPI(title="gym-mvp-local-backend")
 SESSION_FACTORY = None
+MEDIA_STORE: MediaStore | None = None
+MEDIA_PIPELINE: MediaPipeline | None = None
+MEDIA_CACHE_CONTROL = "public, max-age=86400"
 
 
 def event_to_dict(row: Event) -> dict:
@@ -40,6 +51,7 @@ def event_to_dict(row: Event) -> dict:
         "mm_description": row.mm_description,
         "mm_labels": row.mm_labels or [],
         "mm_confidence": row.mm_confidence,
+        "stage_ts": row.stage_ts or {},
         "media": {
             "kind": media.kind if media else "CLIP",
             "path": media.path if media else "",
@@ -74,6 +86,7 @@ def ingest_event(payload: EventPayload) -> dict:
             metrics=payload.metrics,
             needs_mm=payload.needs_mm,
             mm_status="PENDING" if payload.needs_mm else "SKIPPED",
+            stage_ts=payload.stage_ts,
         )
         media = Media(
             event_id=payload.event_id,
@@ -84,7 +97,11 @@ def ingest_event(payload: EventPayload) -> dict:
         )
         session.add(event)
         session.add(media)
+        # The flush waits for SQLite's write lock, so busy waits show up in ingest_commit.
+        session.flush()
+        event.stage_ts = {**payload.stage_ts, "ingest_commit": utc_ts()}
         session.commit()
+        _schedule_renditions(payload.event_id, payload.media.path)
         return {"status": "created", "event_id": payload.event_id}
     except IntegrityError:
         session.rollback()
@@ -93,6 +110,27 @@ def ingest_event(payload: EventPayload) -> dict:
         session.close()
 
 
+def filter_events(
+    stmt,
+    event_type: str | None,
+    camera_id: str | None,
+    zone_id: str | None,
+    start_ts: float | None,
+    end_ts: float | None,
+):
+    if event_type:
+        stmt = stmt.where(Event.event_type == event_type)
+    if camera_id:
+        stmt = stmt.where(Event.camera_id == camera_id)
+    if zone_id:
+        stmt = stmt.where(Event.zone_id == zone_id)
+    if start_ts:
+        stmt = stmt.where(Event.ts_utc >= start_ts)
+    if end_ts:
+        stmt = stmt.where(Event.ts_utc <= end_ts)
+    return stmt
+
+
 @app.get("/events")
 def list_events(
     event_type: str | None = None,
@@ -105,16 +143,7 @@ def list_events(
     session = get_session_local(SESSION_FACTORY)
     try:
         stmt = select(Event).order_by(Event.ts_utc.desc()).limit(limit)
-        if event_type:
-            stmt = stmt.where(Event.event_type == event_type)
-        if camera_id:
-            stmt = stmt.where(Event.camera_id == camera_id)
-        if zone_id:
-            stmt = stmt.where(Event.zone_id == zone_id)
-        if start_ts:
-            stmt = stmt.where(Event.ts_utc >= start_ts)
-        if end_ts:
-            stmt = stmt.where(Event.ts_utc <= end_ts)
+        stmt = filter_events(stmt, event_type, camera_id, zone_id, start_ts, end_ts)
         rows = session.scalars(stmt).all()
         for row in rows:
             _ = row.media
@@ -123,6 +152,113 @@ def list_events(
         session.close()
 
 
+EXPORT_COLUMNS = [
+    Event.event_id,
+    Event.ts_utc,
+    Event.store_id,
+    Event.camera_id,
+    Event.person_id,
+    Event.track_id,
+    Event.event_type,
+    Event.zone_id,
+    Event.metrics,
+    Event.needs_mm,
+    Event.mm_status,
+    Event.mm_description,
+    Event.mm_labels,
+    Event.mm_confidence,
+    Event.stage_ts,
+    Media.kind.label("media_kind"),
+    Media.path.label("media_path"),
+    Media.start_ts_utc.label("media_start_ts_utc"),
+    Media.end_ts_utc.label("media_end_ts_utc"),
+]
+EXPORT_KEYS = [c.key for c in EXPORT_COLUMNS]
+EXPORT_CHUNK_ROWS = 1000
+
+
+def _export_pages(stmt):
+    """Yield pages of rows by keyset pagination on (ts_utc, id).
+
+    Each page is read in its own short session, so a long export never holds a
+    SQLite read lock that would block ingest and the worker.
+    """
+    last = None
+    while True:
+        page_stmt = stmt
+        if last is not None:
+            # The leading `>=` keeps this an index range seek instead of a full index scan.
+            page_stmt = page_stmt.where(
+                Event.ts_utc >= last[0], or_(Event.ts_utc > last[0], Event.id > last[1])
+            )
+        session = get_session_local(SESSION_FACTORY)
+        try:
+            rows = session.execute(page_stmt.limit(EXPORT_CHUNK_ROWS)).all()
+        finally:
+            session.close()
+        if not rows:
+            return
+        yield [row[:-1] for row in rows]
+        if len(rows) < EXPORT_CHUNK_ROWS:
+            return
+        last = (rows[-1].ts_utc, rows[-1][-1])
+
+
+def export_stmt(
+    event_type: str | None = None,
+    camera_id: str | None = None,
+    zone_id: str | None = None,
+    start_ts: float | None = None,
+    end_ts: float | None = None,
+):
+    """Export query: `EXPORT_COLUMNS` plus the trailing `Event.id` that `_export_pages` pages on."""
+    stmt = (
+        select(*EXPORT_COLUMNS, Event.id)
+        .outerjoin(Media, Media.event_id == Event.event_id)
+        .order_by(Event.ts_utc, Event.id)
+    )
+    return filter_events(stmt, event_type, camera_id, zone_id, start_ts, end_ts)
+
+
+def _export_chunks(stmt, fmt: str):
+    """Yield one encoded chunk per page of `EXPORT_CHUNK_ROWS` rows."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_KEYS)
+    for page in _export_pages(stmt):
+        if fmt == "csv":
+            for row in page:
+                writer.writerow(json.dumps(v) if isinstance(v, (dict, list)) else v for v in row)
+            chunk = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        else:
+            chunk = "".join(json.dumps(dict(zip(EXPORT_KEYS, row))) + "\n" for row in page)
+        yield chunk.encode("utf-8")
+    if fmt == "csv" and buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+@app.get("/events/export")
+def export_events(
+    event_type: str | None = None,
+    camera_id: str | None = None,
+    zone_id: str | None = None,
+    start_ts: float | None = Query(default=None),
+    end_ts: float | None = Query(default=None),
+    fmt: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+):
+    """Stream all matching events oldest-first as NDJSON or CSV without materializing the result."""
+    stmt = export_stmt(event_type, camera_id, zone_id, start_ts, end_ts)
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(stmt, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="events.{fmt}"'},
+    )
+
+
 @app.get("/events/{event_id}")
 def get_event(event_id: str):
     session = get_session_local(SESSION_FACTORY)
@@ -136,14 +272,152 @@ def get_event(event_id: str):
         session.close()
 
 
+@app.get("/stats/latency")
+def get_latency_stats(
+    camera_id: str | None = None,
+    start_ts: float | None = Query(default=None),
+    end_ts: float | None = Query(default=None),
+):
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        stmt = select(Event.camera_id, Event.stage_ts)
+        if camera_id:
+            stmt = stmt.where(Event.camera_id == camera_id)
+        if start_ts:
+            stmt = stmt.where(Event.ts_utc >= start_ts)
+        if end_ts:
+            stmt = stmt.where(Event.ts_utc <= end_ts)
+        return latency_stats(session.execute(stmt))
+    finally:
+        session.close()
+
+
+def _schedule_renditions(event_id: str, path: str) -> None:
+    """Only clips inside the media dir are processed; `media.path` is client-supplied."""
+    if MEDIA_PIPELINE and path and MEDIA_STORE.contains(path):
+        MEDIA_PIPELINE.submit(event_id, path)
+
+
+def _media_file(
+    request: Request, path: str | None, media_type: str, filename: str, cache_control: str = MEDIA_CACHE_CONTROL
+) -> Response:
+    """Serve a media file inline with ETag revalidation; FileResponse answers Range requests with 206."""
+    if not path or not Path(path).exists():
+        raise HTTPException(status_code=404, detail="media not found")
+    resp = FileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        stat_result=os.stat(path),
+        content_disposition_type="inline",
+        headers={"Cache-Control": cache_control},
+    )
+    if request.headers.get("if-none-match") == resp.headers["etag"]:
+        return Response(status_code=304, headers={"ETag": resp.headers["etag"], "Cache-Control": cache_control})
+    return resp
+
+
 @app.get("/media/{event_id}")
-def get_media(event_id: str):
+def get_media(event_id: str, request: Request):
+    """Event clip; only the final web rendition is cacheable, earlier versions revalidate by ETag."""
     session = get_session_local(SESSION_FACTORY)
     try:
         media = session.scalar(select(Media).where(Media.event_id == event_id))
-        if not media or not Path(media.path).exists():
+        if not media:
             raise HTTPException(status_code=404, detail="media not found")
-        return FileResponse(media.path, media_type="video/mp4", filename=f"{event_id}.mp4")
+        web_path = (media.renditions or {}).get("web_path")
+        if web_path and Path(web_path).exists():
+            return _media_file(request, web_path, "video/mp4", f"{event_id}.mp4")
+        return _media_file(request, media.path, "video/mp4", f"{event_id}.mp4", cache_control="no-cache")
+    finally:
+        session.close()
+
+
+@app.get("/media/{event_id}/poster")
+def get_media_poster(event_id: str, request: Request):
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        media = _get_media_or_404(session, event_id)
+        return _media_file(request, (media.renditions or {}).get("poster_path"), "image/jpeg", f"{event_id}.jpg")
+    finally:
+        session.close()
+
+
+@app.get("/media/{event_id}/thumbs")
+def get_media_thumbs(event_id: str, request: Request):
+    """Thumbnail sprite; the tile grid is described by the X-Thumbs-* headers."""
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        media = _get_media_or_404(session, event_id)
+        renditions = media.renditions or {}
+        resp = _media_file(request, renditions.get("thumbs_path"), "image/jpeg", f"{event_id}_thumbs.jpg")
+        layout = renditions.get("thumbs", {})
+        resp.headers["X-Thumbs-Count"] = str(layout.get("count", 0))
+        resp.headers["X-Thumbs-Columns"] = str(layout.get("columns", 0))
+        resp.headers["X-Thumbs-Tile"] = f"{layout.get('tile_width', 0)}x{layout.get('tile_height', 0)}"
+        return resp
+    finally:
+        session.close()
+
+
+def _link_blob(session, media: Media, sha256: str) -> None:
+    media.path = str(MEDIA_STORE.blob_path(sha256))
+    media.sha256 = sha256
+    session.commit()
+    # Renditions already built from the same bytes at ingest (shared-disk setup) are kept.
+    if (media.renditions or {}).get("sha256") != sha256:
+        _schedule_renditions(media.event_id, media.path)
+
+
+def _get_media_or_404(session, event_id: str) -> Media:
+    media = session.scalar(select(Media).where(Media.event_id == event_id))
+    if not media:
+        raise HTTPException(status_code=404, detail="event not found")
+    return media
+
+
+@app.post("/media/{event_id}/upload")
+def start_upload(event_id: str, sha256: str = Form(..., pattern=SHA256_PATTERN)):
+    """Begin or resume a clip upload; links immediately if a clip with the same hash is stored."""
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        media = _get_media_or_404(session, event_id)
+        if MEDIA_STORE.has_blob(sha256):
+            if media.sha256 != sha256:
+                _link_blob(session, media, sha256)
+            return {"status": "linked", "event_id": event_id}
+        return {"status": "pending", "event_id": event_id, "offset": MEDIA_STORE.offset(event_id)}
+    finally:
+        session.close()
+
+
+@app.put("/media/{event_id}/upload")
+def upload_chunk(event_id: str, offset: int = Query(...), chunk: UploadFile = File(...)):
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        _get_media_or_404(session, event_id)
+    finally:
+        session.close()
+    try:
+        new_offset = MEDIA_STORE.append(event_id, offset, chunk.file)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail={"offset": exc.args[0]})
+    return {"event_id": event_id, "offset": new_offset}
+
+
+@app.post("/media/{event_id}/upload/complete")
+def complete_upload(event_id: str, sha256: str = Form(..., pattern=SHA256_PATTERN)):
+    session = get_session_local(SESSION_FACTORY)
+    try:
+        media = _get_media_or_404(session, event_id)
+        try:
+            MEDIA_STORE.finalize(event_id, sha256)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="upload not found")
+        except ValueError:
+            raise HTTPException(status_code=422, detail="sha256 mismatch")
+        _link_blob(session, media, sha256)
+        return {"status": "stored", "event_id": event_id}
     finally:
         session.close()
 
@@ -154,18 +428,24 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--media-dir", required=True)
     p.add_argument("--host", default="0.0.0.0")
     p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--media-workers", type=int, default=2)
     return p.parse_args()
 
 
 def main() -> None:
-    global SESSION_FACTORY
+    global SESSION_FACTORY, MEDIA_STORE, MEDIA_PIPELINE
     args = parse_args()
     Path(args.db).parent.mkdir(parents=True, exist_ok=True)
-    Path(args.media_dir).mkdir(parents=True, exist_ok=True)
+    MEDIA_STORE = MediaStore(args.media_dir)
     engine = make_engine(args.db)
     Base.metadata.create_all(engine)
+    add_missing_columns(engine, Base.metadata)
     SESSION_FACTORY = make_session_factory(engine)
-    uvicorn.run(app, host=args.host, port=args.port)
+    MEDIA_PIPELINE = MediaPipeline(SESSION_FACTORY, str(MEDIA_STORE.derived_dir), args.media_workers)
+    try:
+        uvicorn.run(app, host=args.host, port=args.port)
+    finally:
+        MEDIA_PIPELINE.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+"""Post-export clip renditions: web-playable H.264, poster frame and thumbnail sprite."""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from sqlalchemy import select
+
+from backend_api.db import get_session_local
+from backend_api.media_store import file_sha256
+from backend_api.models import Media
+
+logger = logging.getLogger(__name__)
+
+WEB_MAX_WIDTH = 640
+WEB_BITRATE = "800k"
+WEB_MAXRATE = "1000k"
+POSTER_MAX_WIDTH = 640
+THUMB_COUNT = 10
+THUMB_WIDTH = 160
+THUMB_COLUMNS = 5
+JPEG_QUALITY = 80
+
+
+def transcode_web(src: str, out_path: Path) -> bool:
+    """Faststart H.264 at a capped width/bitrate; needs the `ffmpeg` binary (OpenCV wheels ship no H.264 encoder)."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return False
+    tmp = out_path.with_suffix(f".{os.getpid()}.tmp.mp4")
+    cmd = [
+        ffmpeg, "-y", "-loglevel", "error", "-i", src, "-an",
+        "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main", "-pix_fmt", "yuv420p",
+        "-b:v", WEB_BITRATE, "-maxrate", WEB_MAXRATE, "-bufsize", "2000k",
+        "-vf", f"scale='min({WEB_MAX_WIDTH},iw)':-2",
+        "-movflags", "+faststart", str(tmp),
+    ]
+    if subprocess.run(cmd, capture_output=True).returncode != 0:
+        tmp.unlink(missing_ok=True)
+        return False
+    os.replace(tmp, out_path)
+    return True
+
+
+def _resize_to_width(frame, width: int):
+    h, w = frame.shape[:2]
+    if w <= width:
+        return frame
+    return cv2.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+
+def _write_jpeg(path: Path, image) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.tmp.jpg")
+    cv2.imwrite(str(tmp), image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    os.replace(tmp, path)
+
+
+def _frame_count(src: str) -> int:
+    cap = cv2.VideoCapture(src)
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if count <= 0:
+        while cap.grab():
+            count += 1
+    cap.release()
+    return count
+
+
+def extract_stills(src: str, poster_path: Path, thumbs_path: Path) -> dict | None:
+    """Write the middle frame as poster and evenly spaced frames as one sprite; returns the sprite layout."""
+    count = _frame_count(src)
+    if count == 0:
+        return None
+    poster_idx = count // 2
+    thumb_idxs = sorted({int(i * count / THUMB_COUNT) for i in range(THUMB_COUNT)})
+    wanted = set(thumb_idxs) | {poster_idx}
+
+    poster = None
+    thumbs = []
+    cap = cv2.VideoCapture(src)
+    for idx in range(max(wanted) + 1):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if idx == poster_idx:
+            poster = _resize_to_width(frame, POSTER_MAX_WIDTH)
+        if idx in thumb_idxs:
+            thumbs.append(cv2.resize(frame, (THUMB_WIDTH, max(1, round(frame.shape[0] * THUMB_WIDTH / frame.shape[1])))))
+    cap.release()
+    if not thumbs:
+        return None
+
+    _write_jpeg(poster_path, poster if poster is not None else thumbs[len(thumbs) // 2])
+
+    tile_h = thumbs[0].shape[0]
+    cols = min(THUMB_COLUMNS, len(thumbs))
+    rows = -(-len(thumbs) // cols)
+    sprite = np.zeros((rows * tile_h, cols * THUMB_WIDTH, 3), dtype=np.uint8)
+    for i, thumb in enumerate(thumbs):
+        r, c = divmod(i, cols)
+        sprite[r * tile_h : (r + 1) * tile_h, c * THUMB_WIDTH : (c + 1) * THUMB_WIDTH] = thumb[:tile_h]
+    _write_jpeg(thumbs_path, sprite)
+    return {"count": len(thumbs), "columns": cols, "tile_width": THUMB_WIDTH, "tile_height": tile_h}
+
+
+def process_clip(src: str, out_dir: str) -> dict:
+    """Build all renditions for `src` under `out_dir/<sha256>.*`.
+
+    Keyed by content hash, so the same clip reached via its edge path and via its
+    uploaded blob is processed once; later calls just return the manifest.
+    """
+    key = file_sha256(src)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = out / f"{key}.json"
+    if manifest.exists():
+        return json.loads(manifest.read_text(encoding="utf-8"))
+
+    web_path = out / f"{key}.web.mp4"
+    poster_path = out / f"{key}.poster.jpg"
+    thumbs_path = out / f"{key}.thumbs.jpg"
+    renditions: dict = {"sha256": key}
+    if web_path.exists() or transcode_web(src, web_path):
+        renditions["web_path"] = str(web_path)
+    layout = extract_stills(src, poster_path, thumbs_path)
+    if layout:
+        renditions.update(poster_path=str(poster_path), thumbs_path=str(thumbs_path), thumbs=layout)
+
+    tmp = manifest.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(renditions), encoding="utf-8")
+    os.replace(tmp, manifest)
+    return renditions
+
+
+def store_renditions(session_factory, event_id: str, renditions: dict) -> None:
+    session = get_session_local(session_factory)
+    try:
+        media = session.scalar(select(Media).where(Media.event_id == event_id))
+        if media:
+            media.renditions = renditions
+            session.commit()
+    finally:
+        session.close()
+
+
+class MediaPipeline:
+    """Runs `process_clip` in a process pool and records results on the event's `Media` row."""
+
+    def __init__(self, session_factory, out_dir: str, max_workers: int = 2):
+        self.session_factory = session_factory
+        self.out_dir = out_dir
+        # Spawned, not forked: submit() runs on a threadpool thread of the running server, and
+        # OpenCV/ffmpeg children forked from a multithreaded parent can deadlock.
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, event_id: str, src: str) -> Future:
+        future = self.pool.submit(process_clip, src, self.out_dir)
+        future.add_done_callback(lambda f: self._on_done(event_id, f))
+        return future
+
+    def _on_done(self, event_id: str, future: Future) -> None:
+        try:
+            store_renditions(self.session_factory, event_id, future.result())
+        except Exception:
+            logger.exception("media pipeline failed for event %s", event_id)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,79 @@
+"""Content-addressed clip storage with resumable partial uploads."""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import BinaryIO
+
+COPY_BUFSIZE = 1024 * 1024
+SHA256_PATTERN = "^[0-9a-f]{64}$"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFSIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """Stores finished clips as `blobs/<sha256>.mp4`, in-flight uploads as `partial/<event_id>.part`
+    and web renditions under `derived/`."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.partial_dir = self.root / "partial"
+        self.derived_dir = self.root / "derived"
+        for d in (self.blob_dir, self.partial_dir, self.derived_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> Path:
+        if not re.fullmatch(SHA256_PATTERN, sha256):
+            raise ValueError(f"invalid sha256: {sha256!r}")
+        return self.blob_dir / f"{sha256}.mp4"
+
+    def contains(self, path: str | Path) -> bool:
+        """True if `path` resolves (symlinks included) to a regular file under the store root."""
+        resolved = Path(path).resolve()
+        return resolved.is_relative_to(self.root.resolve()) and resolved.is_file()
+
+    def partial_path(self, event_id: str) -> Path:
+        return self.partial_dir / f"{event_id}.part"
+
+    def has_blob(self, sha256: str) -> bool:
+        return self.blob_path(sha256).exists()
+
+    def offset(self, event_id: str) -> int:
+        part = self.partial_path(event_id)
+        return part.stat().st_size if part.exists() else 0
+
+    def append(self, event_id: str, offset: int, chunk: BinaryIO) -> int:
+        """Append `chunk` at `offset`; returns the new offset or raises ValueError on a gap/overlap."""
+        current = self.offset(event_id)
+        if offset != current:
+            raise ValueError(current)
+        with self.partial_path(event_id).open("ab") as f:
+            shutil.copyfileobj(chunk, f, COPY_BUFSIZE)
+        return self.offset(event_id)
+
+    def finalize(self, event_id: str, sha256: str) -> Path:
+        """Verify the partial upload and move it into the blob store, dropping it if the blob exists."""
+        part = self.partial_path(event_id)
+        blob = self.blob_path(sha256)
+        if not part.exists():
+            if blob.exists():
+                return blob  # retried completion after the blob was already stored
+            raise FileNotFoundError(event_id)
+        if file_sha256(part) != sha256:
+            part.unlink()
+            raise ValueError("sha256 mismatch")
+        if blob.exists():
+            part.unlink()
+        else:
+            os.replace(part, blob)
+        return blob
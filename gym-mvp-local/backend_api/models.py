@@ -25,6 +25,7 @@ class Event(Base):
     mm_description: Mapped[str | None] = mapped_column(String, nullable=True)
     mm_labels: Mapped[list] = mapped_column(JSON, default=list)
     mm_confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    stage_ts: Mapped[dict] = mapped_column(JSON, default=dict)
 
     media: Mapped["Media | None"] = relationship("Media", back_populates="event", uselist=False)
 
@@ -38,5 +39,7 @@ class Media(Base):
     path: Mapped[str] = mapped_column(String)
     start_ts_utc: Mapped[float] = mapped_column(Float)
     end_ts_utc: Mapped[float] = mapped_column(Float)
+    sha256: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    renditions: Mapped[dict] = mapped_column(JSON, default=dict)
 
     event: Mapped[Event] = relationship("Event", back_populates="media")
@@ -17,9 +17,11 @@ from edge_service.event_rules import EventRulesEngine, RuleConfig
 from edge_service.mocks import CleaningMotionMock, DetectorMock, TrackerMock
 from edge_service.outbox import OutboxQueue
 from edge_service.sender import EventSender
+from edge_service.track_log import TrackLogWriter
+from edge_service.uploader import MediaUploader
 from edge_service.video_source import VideoSource
 from shared.schemas import EventPayload, MediaPayload
-from shared.utils import make_event_id
+from shared.utils import make_event_id, utc_ts
 
 
 def point_in_roi(point: tuple[float, float], roi: dict) -> bool:
@@ -34,6 +36,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--store-id", required=True)
     p.add_argument("--seed", type=int, default=42)
     p.add_argument("--config", default=str(ROOT / "edge_service" / "config.yaml"))
+    p.add_argument("--track-log", default=None, help="Record per-frame track/ROI membership for replay_rules.py")
     return p.parse_args()
 
 
@@ -45,6 +48,8 @@ def main() -> None:
     media_dir = data_dir / "media"
     outbox = OutboxQueue(str(data_dir / "outbox.jsonl"))
     sender = EventSender("http://localhost:8000/ingest/event", outbox)
+    uploader = MediaUploader("http://localhost:8000", OutboxQueue(str(data_dir / "upload_queue.jsonl")))
+    uploader.start()
 
     source = VideoSource(args.video, cfg.get("video_fps_override"))
     clip_buffer = ClipBuffer(source.fps, cfg["clip_pre_s"], cfg["clip_post_s"])
@@ -53,38 +58,50 @@ def main() -> None:
     detector = DetectorMock(args.seed)
     tracker = TrackerMock()
     motion = CleaningMotionMock(args.seed)
-
-    for pkt in source:
-        frame = pkt.frame
-        h, w = frame.shape[:2]
-        clip_buffer.push(pkt.ts_utc, frame)
-        sender.flush_outbox()
-
-        tracked = tracker.track(detector.detect(pkt.frame_idx, w, h))
-        for roi in cfg["rois"]:
-            in_zone = [tid for tid, det in tracked if point_in_roi(det.center, roi)]
-            evs = rules.process(pkt.ts_utc, roi["zone_id"], in_zone, motion.is_hand_motion(pkt.frame_idx, roi["zone_id"]))
-            for ev in evs:
-                event_id = make_event_id()
-                out_path = media_dir / f"{event_id}.mp4"
-                start_ts, end_ts = clip_buffer.export_clip(pkt.ts_utc, str(out_path))
-                payload = EventPayload(
-                    event_id=event_id,
-                    ts_utc=pkt.ts_utc,
-                    store_id=args.store_id,
-                    camera_id=args.camera_id,
-                    person_id="p_0001",
-                    track_id=ev.track_id,
-                    event_type=ev.event_type,
-                    zone_id=ev.zone_id,
-                    metrics={"dwell_s": ev.dwell_s},
-                    media=MediaPayload(path=str(out_path), start_ts_utc=start_ts, end_ts_utc=end_ts),
-                    needs_mm=ev.needs_mm,
-                ).model_dump(mode="json")
-                print(json.dumps(payload))
-                sender.send_with_retry(payload)
-
-    source.close()
+    track_log = TrackLogWriter(args.track_log) if args.track_log else None
+
+    try:
+        for pkt in source:
+            frame = pkt.frame
+            h, w = frame.shape[:2]
+            clip_buffer.push(pkt.ts_utc, frame)
+            sender.flush_outbox()
+
+            tracked = tracker.track(detector.detect(pkt.frame_idx, w, h))
+            for roi in cfg["rois"]:
+                in_zone = [tid for tid, det in tracked if point_in_roi(det.center, roi)]
+                cleaning_motion = motion.is_hand_motion(pkt.frame_idx, roi["zone_id"])
+                if track_log:
+                    track_log.append(pkt.ts_utc, roi["zone_id"], in_zone, cleaning_motion)
+                evs = rules.process(pkt.ts_utc, roi["zone_id"], in_zone, cleaning_motion)
+                fired_ts = utc_ts()
+                for ev in evs:
+                    event_id = make_event_id()
+                    out_path = media_dir / f"{event_id}.mp4"
+                    start_ts, end_ts = clip_buffer.export_clip(pkt.ts_utc, str(out_path))
+                    stage_ts = {"frame_capture": pkt.ts_utc, "rule_fire": fired_ts, "clip_exported": utc_ts()}
+                    payload = EventPayload(
+                        event_id=event_id,
+                        ts_utc=pkt.ts_utc,
+                        store_id=args.store_id,
+                        camera_id=args.camera_id,
+                        person_id="p_0001",
+                        track_id=ev.track_id,
+                        event_type=ev.event_type,
+                        zone_id=ev.zone_id,
+                        metrics={"dwell_s": ev.dwell_s},
+                        media=MediaPayload(path=str(out_path), start_ts_utc=start_ts, end_ts_utc=end_ts),
+                        needs_mm=ev.needs_mm,
+                        stage_ts=stage_ts,
+                    ).model_dump(mode="json")
+                    print(json.dumps(payload))
+                    sender.send_with_retry(payload)
+                    uploader.enqueue(event_id, str(out_path))
+    finally:
+        source.close()
+        if track_log:
+            track_log.close()
+        uploader.stop()
 
 
 if __name__ == "__main__":
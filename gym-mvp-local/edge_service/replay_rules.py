@@ -0,0 +1,157 @@
+"""Replay recorded track logs through the rules engine for many rule configs in parallel."""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from edge_service.event_rules import EventRulesEngine, RuleConfig
+from edge_service.track_log import TrackLogColumns, read_track_log
+
+_LOGS: dict[str, TrackLogColumns] = {}
+# Baseline and candidate events of the same log/zone/type this close together are the same event, shifted.
+MATCH_WINDOW_S = 30.0
+SHIFT_EPS_S = 1e-3
+
+
+def replay_log(cols: TrackLogColumns, cfg: RuleConfig) -> list[tuple[float, str, str, str]]:
+    """Run one fresh engine over a decoded log and return (ts, zone, type, track) per event."""
+    engine = EventRulesEngine(cfg)
+    fired = []
+    for ts, zone_id, tracks_in_zone, motion in cols.iter_frames():
+        for ev in engine.process(ts, zone_id, tracks_in_zone, motion):
+            fired.append((ts, ev.zone_id, ev.event_type.value, ev.track_id))
+    return fired
+
+
+def _event_times(logs: dict[str, TrackLogColumns], cfg: RuleConfig) -> dict[tuple[str, str, str], list[float]]:
+    """Fire times per (log, zone, event_type), in order."""
+    times: dict[tuple[str, str, str], list[float]] = defaultdict(list)
+    for name, cols in logs.items():
+        for ts, zone_id, event_type, _ in replay_log(cols, cfg):
+            times[(name, zone_id, event_type)].append(ts)
+    return dict(times)
+
+
+def match_events(times: list[float], base_times: list[float], window_s: float) -> tuple[list[float], int, int]:
+    """Pair candidate with baseline fire times in order, within `window_s` of each other.
+
+    Returns (shift of each paired event, unpaired candidates, unpaired baseline events).
+    """
+    shifts: list[float] = []
+    added = removed = 0
+    i = j = 0
+    while i < len(times) and j < len(base_times):
+        delta = times[i] - base_times[j]
+        if abs(delta) <= window_s:
+            shifts.append(delta)
+            i += 1
+            j += 1
+        elif delta < 0:
+            added += 1
+            i += 1
+        else:
+            removed += 1
+            j += 1
+    return shifts, added + len(times) - i, removed + len(base_times) - j
+
+
+def _init_worker(paths: list[str]) -> None:
+    for path in paths:
+        _LOGS[path] = read_track_log(path)
+
+
+def _run_config(cfg: RuleConfig) -> tuple[RuleConfig, dict]:
+    return cfg, _event_times(_LOGS, cfg)
+
+
+def summarize(
+    cfg: RuleConfig,
+    events: dict[tuple[str, str, str], list[float]],
+    baseline: dict[tuple[str, str, str], list[float]],
+    match_window_s: float = MATCH_WINDOW_S,
+) -> dict:
+    """Diff against the baseline config: events that only moved in time are reported as
+    `shifted` with their deltas, apart from events that were `added` or `removed`."""
+    counts, base_counts = Counter(), Counter()
+    shifts: dict[str, list[float]] = defaultdict(list)
+    added = removed = 0
+    for key in sorted(set(events) | set(baseline)):
+        event_type = key[2]
+        times, base_times = events.get(key, []), baseline.get(key, [])
+        counts[event_type] += len(times)
+        base_counts[event_type] += len(base_times)
+        paired, key_added, key_removed = match_events(times, base_times, match_window_s)
+        shifts[event_type].extend(d for d in paired if abs(d) > SHIFT_EPS_S)
+        added += key_added
+        removed += key_removed
+    types = sorted(set(counts) | set(base_counts))
+    return {
+        "config": asdict(cfg),
+        "total": sum(counts.values()),
+        "counts": {t: counts[t] for t in types},
+        "count_delta": {t: counts[t] - base_counts[t] for t in types if counts[t] != base_counts[t]},
+        "added": added,
+        "removed": removed,
+        "shifted": sum(len(d) for d in shifts.values()),
+        "shift_s": {
+            t: {"mean": round(sum(d) / len(d), 3), "min": round(min(d), 3), "max": round(max(d), 3)}
+            for t, d in sorted(shifts.items())
+            if d
+        },
+    }
+
+
+def build_grid(args: argparse.Namespace, base: RuleConfig) -> list[RuleConfig]:
+    starts = args.occupy_start_s or [base.occupy_start_s]
+    ends = args.occupy_end_s or [base.occupy_end_s]
+    windows = args.cleaning_window_s or [base.cleaning_window_s]
+    return [RuleConfig(s, e, w) for s, e, w in itertools.product(starts, ends, windows)]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--log", action="append", required=True, help="Track log recorded by edge_service --track-log")
+    p.add_argument("--config", default=str(ROOT / "edge_service" / "config.yaml"))
+    p.add_argument("--occupy-start-s", type=float, nargs="+")
+    p.add_argument("--occupy-end-s", type=float, nargs="+")
+    p.add_argument("--cleaning-window-s", type=float, nargs="+")
+    p.add_argument("--match-window-s", type=float, default=MATCH_WINDOW_S, help="Max shift still reported as the same event")
+    p.add_argument("--workers", type=int, default=None)
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    cfg = yaml.safe_load(Path(args.config).read_text(encoding="utf-8"))
+    base = RuleConfig(cfg["occupy_start_s"], cfg["occupy_end_s"], cfg["cleaning_window_s"])
+    grid = build_grid(args, base)
+
+    started = time.time()
+    _init_worker(args.log)
+    baseline = _event_times(_LOGS, base)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.log,)) as pool:
+        for rule_cfg, events in pool.map(_run_config, grid):
+            print(json.dumps(summarize(rule_cfg, events, baseline, args.match_window_s)))
+
+    frames = sum(len(c) for c in _LOGS.values())
+    print(
+        f"replayed {frames} frames x {len(grid)} configs in {time.time() - started:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
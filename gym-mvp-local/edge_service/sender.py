@@ -6,6 +6,7 @@ import time
 import requests
 
 from edge_service.outbox import OutboxQueue
+from shared.utils import utc_ts
 
 
 class EventSender:
@@ -22,6 +23,7 @@ class EventSender:
             return False
 
     def send_with_retry(self, payload: dict, retries: int = 4) -> bool:
+        payload.setdefault("stage_ts", {}).setdefault("first_send", utc_ts())
         backoff = 0.5
         for _ in range(retries):
             if self._send_once(payload):
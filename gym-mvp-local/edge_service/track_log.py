@@ -0,0 +1,149 @@
+"""Compact columnar log of per-frame track/ROI membership for offline rule replay."""
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+MAGIC = b"GTL1"
+CHUNK_TAG = b"CHNK"
+_CHUNK_HEADER = struct.Struct("<4sIII")
+_ROW_BYTES = 8 + 2 + 1 + 2  # ts_utc, zone_idx, cleaning_motion, member_count
+_MEMBER_BYTES = 4
+
+
+@dataclass
+class TrackLogColumns:
+    """Decoded track log; one entry per `EventRulesEngine.process` call."""
+
+    ts_utc: array
+    zone_idx: array
+    cleaning_motion: array
+    member_count: array
+    members: array
+    zones: list[str]
+    tracks: list[str]
+
+    def __len__(self) -> int:
+        return len(self.ts_utc)
+
+    def iter_frames(self):
+        zones, tracks, members = self.zones, self.tracks, self.members
+        pos = 0
+        for ts, zi, motion, n in zip(self.ts_utc, self.zone_idx, self.cleaning_motion, self.member_count):
+            yield ts, zones[zi], [tracks[m] for m in members[pos : pos + n]], bool(motion)
+            pos += n
+
+
+def _to_le(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, raw: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(raw)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+class TrackLogWriter:
+    """Buffers rows column-wise and appends them to disk in fixed-size chunks.
+
+    Zone and track ids are interned; each chunk carries only the ids first seen in it.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 4096):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self._f = self.path.open("wb")
+        self._f.write(MAGIC)
+        self._zone_ids: dict[str, int] = {}
+        self._track_ids: dict[str, int] = {}
+        self._new_zones: list[str] = []
+        self._new_tracks: list[str] = []
+        self._reset_columns()
+
+    def _reset_columns(self) -> None:
+        self._ts = array("d")
+        self._zone = array("H")
+        self._motion = array("B")
+        self._count = array("H")
+        self._members = array("I")
+
+    def _intern(self, value: str, table: dict[str, int], new: list[str]) -> int:
+        idx = table.get(value)
+        if idx is None:
+            idx = table[value] = len(table)
+            new.append(value)
+        return idx
+
+    def append(self, ts_utc: float, zone_id: str, tracks_in_zone: list[str], cleaning_motion: bool) -> None:
+        self._ts.append(ts_utc)
+        self._zone.append(self._intern(zone_id, self._zone_ids, self._new_zones))
+        self._motion.append(1 if cleaning_motion else 0)
+        self._count.append(len(tracks_in_zone))
+        for tid in tracks_in_zone:
+            self._members.append(self._intern(tid, self._track_ids, self._new_tracks))
+        if len(self._ts) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._ts:
+            return
+        strings = json.dumps({"zones": self._new_zones, "tracks": self._new_tracks}).encode("utf-8")
+        self._f.write(_CHUNK_HEADER.pack(CHUNK_TAG, len(self._ts), len(self._members), len(strings)))
+        self._f.write(strings)
+        for col in (self._ts, self._zone, self._motion, self._count, self._members):
+            self._f.write(_to_le(col))
+        self._f.flush()
+        self._new_zones = []
+        self._new_tracks = []
+        self._reset_columns()
+
+    def close(self) -> None:
+        self.flush()
+        self._f.close()
+
+    def __enter__(self) -> "TrackLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_track_log(path: str) -> TrackLogColumns:
+    raw = Path(path).read_bytes()
+    if raw[:4] != MAGIC:
+        raise ValueError(f"Not a track log: {path}")
+    cols = TrackLogColumns(array("d"), array("H"), array("B"), array("H"), array("I"), [], [])
+    pos = 4
+    while pos + _CHUNK_HEADER.size <= len(raw):
+        tag, n_rows, n_members, n_strings = _CHUNK_HEADER.unpack_from(raw, pos)
+        if tag != CHUNK_TAG:
+            raise ValueError(f"Corrupt track log chunk at offset {pos}: {path}")
+        pos += _CHUNK_HEADER.size
+        if pos + n_strings + n_rows * _ROW_BYTES + n_members * _MEMBER_BYTES > len(raw):
+            break  # trailing chunk cut short by an unclean edge shutdown
+        strings = json.loads(raw[pos : pos + n_strings])
+        pos += n_strings
+        cols.zones.extend(strings["zones"])
+        cols.tracks.extend(strings["tracks"])
+        for col, n in (
+            (cols.ts_utc, n_rows),
+            (cols.zone_idx, n_rows),
+            (cols.cleaning_motion, n_rows),
+            (cols.member_count, n_rows),
+            (cols.members, n_members),
+        ):
+            size = n * col.itemsize
+            col.extend(_from_le(col.typecode, raw[pos : pos + size]))
+            pos += size
+    return cols
@@ -0,0 +1,126 @@
+"""Background clip uploader, decoupled from event delivery."""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from edge_service.outbox import OutboxQueue
+
+
+def file_sha256(path: Path, bufsize: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MediaUploader:
+    """Uploads exported clips in resumable chunks from a worker thread.
+
+    Pending jobs are persisted in a JSONL queue so clips survive edge restarts.
+    A job is retried later when the backend is down or has not ingested its event yet.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        queue: OutboxQueue,
+        chunk_size: int = 1024 * 1024,
+        timeout_s: float = 10.0,
+        retry_delay_s: float = 2.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.timeout_s = timeout_s
+        self.retry_delay_s = retry_delay_s
+        self._jobs: list[dict] = queue.read_all()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="media-uploader", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def enqueue(self, event_id: str, path: str) -> None:
+        job = {"event_id": event_id, "path": path}
+        with self._cond:
+            self._jobs.append(job)
+            self.queue.enqueue(job)
+            self._cond.notify()
+
+    def stop(self, drain_timeout_s: float = 30.0) -> None:
+        """Give pending uploads up to `drain_timeout_s`, then stop; unfinished jobs stay queued on disk."""
+        deadline = time.time() + drain_timeout_s
+        with self._cond:
+            while self._jobs and time.time() < deadline:
+                self._cond.wait(timeout=0.2)
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=self.timeout_s)
+
+    def _url(self, event_id: str, suffix: str = "") -> str:
+        return f"{self.base_url}/media/{event_id}/upload{suffix}"
+
+    def upload(self, event_id: str, path: Path) -> bool:
+        """Run one upload attempt; returns True once the backend has the clip (or it no longer exists locally)."""
+        if not path.exists():
+            return True
+        sha256 = file_sha256(path, self.chunk_size)
+        try:
+            resp = requests.post(self._url(event_id), data={"sha256": sha256}, timeout=self.timeout_s)
+            if resp.status_code != 200:
+                return False
+            body = resp.json()
+            if body["status"] == "linked":
+                return True
+
+            offset = body["offset"]
+            size = path.stat().st_size
+            with path.open("rb") as f:
+                f.seek(offset)
+                while offset < size:
+                    chunk = f.read(self.chunk_size)
+                    resp = requests.put(
+                        self._url(event_id),
+                        params={"offset": offset},
+                        files={"chunk": (path.name, chunk, "application/octet-stream")},
+                        timeout=self.timeout_s,
+                    )
+                    if resp.status_code == 409:
+                        offset = resp.json()["detail"]["offset"]
+                        f.seek(offset)
+                        continue
+                    if resp.status_code != 200:
+                        return False
+                    offset = resp.json()["offset"]
+
+            resp = requests.post(self._url(event_id, "/complete"), data={"sha256": sha256}, timeout=self.timeout_s)
+            return resp.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._jobs[0]
+
+            done = self.upload(job["event_id"], Path(job["path"]))
+
+            with self._cond:
+                self._jobs.remove(job)
+                if not done:
+                    self._jobs.append(job)
+                self.queue.rewrite(self._jobs)
+                self._cond.notify_all()
+                if not done:
+                    self._cond.wait(timeout=self.retry_delay_s)
@@ -0,0 +1,301 @@
+"""Benchmark a local backend_api + mm_worker deployment under synthetic multi-store load."""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from loadgen.generator import LoadGenerator, LoadProfile
+
+LOCK_MARKER = "database is locked"
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def latency_summary(latencies_s: list[float]) -> dict:
+    p50, p99 = percentile(latencies_s, 50), percentile(latencies_s, 99)
+    return {
+        "count": len(latencies_s),
+        "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+    }
+
+
+def wait_healthy(base_url: str, timeout_s: float = 15.0) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Backend did not become healthy at {base_url}")
+
+
+class BenchRun:
+    def __init__(self, base_url: str, db_path: str, concurrency: int, seed: int):
+        self.base_url = base_url
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self.rand = random.Random(seed)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.ingest_latencies: list[float] = []
+        self.ingest_status: dict[str, int] = {}
+        self.query_latencies: list[float] = []
+        self.query_errors = 0
+        self.acked_mm: dict[str, float] = {}
+        self.enrich_lags: list[float] = []
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _post(self, payload: dict) -> None:
+        start = time.perf_counter()
+        try:
+            resp = self._session().post(f"{self.base_url}/ingest/event", json=payload, timeout=10)
+            status = resp.json().get("status", "unknown") if resp.status_code == 200 else f"http_{resp.status_code}"
+        except requests.RequestException:
+            status = "error"
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.ingest_latencies.append(elapsed)
+            self.ingest_status[status] = self.ingest_status.get(status, 0) + 1
+            if status == "created" and payload["needs_mm"]:
+                self.acked_mm[payload["event_id"]] = time.time()
+
+    def _query_loop(self, camera_ids: list[str]) -> None:
+        session = requests.Session()
+        while not self._stop.is_set():
+            params = {"limit": 200}
+            if self.rand.random() < 0.5:
+                params["camera_id"] = self.rand.choice(camera_ids)
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"{self.base_url}/events", params=params, timeout=10).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with self._lock:
+                self.query_latencies.append(time.perf_counter() - start)
+                self.query_errors += 0 if ok else 1
+            time.sleep(0.05)
+
+    def _poll_enrichment(self) -> int:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=5)
+        try:
+            done = {row[0] for row in conn.execute("SELECT event_id FROM events WHERE needs_mm = 1 AND mm_status = 'DONE'")}
+        except sqlite3.OperationalError:
+            return -1
+        finally:
+            conn.close()
+        now = time.time()
+        with self._lock:
+            for event_id in done & self.acked_mm.keys():
+                self.enrich_lags.append(now - self.acked_mm.pop(event_id))
+            return len(self.acked_mm)
+
+    def run(self, schedule: list[dict], enrich_timeout_s: float) -> dict:
+        camera_ids = sorted({p["camera_id"] for p in schedule})
+        query_thread = threading.Thread(target=self._query_loop, args=(camera_ids,), daemon=True)
+        query_thread.start()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._post, p) for p in schedule]
+            while any(not f.done() for f in futures):
+                self._poll_enrichment()
+                time.sleep(0.25)
+        ingest_s = time.perf_counter() - started
+
+        deadline = time.time() + enrich_timeout_s
+        pending = self._poll_enrichment()
+        while pending and time.time() < deadline:
+            time.sleep(0.25)
+            pending = self._poll_enrichment()
+        self._stop.set()
+        query_thread.join()
+
+        return {
+            "sent": len(schedule),
+            "ingest_status": self.ingest_status,
+            "ingest_s": round(ingest_s, 3),
+            "ingest_throughput_eps": round(len(schedule) / ingest_s, 1) if ingest_s else None,
+            "ingest": latency_summary(self.ingest_latencies),
+            "query": {**latency_summary(self.query_latencies), "errors": self.query_errors},
+            "enrichment_lag": {**latency_summary(self.enrich_lags), "pending": pending},
+        }
+
+
+def count_lock_errors(log_path: Path) -> int:
+    if not log_path.exists():
+        return 0
+    return log_path.read_text(encoding="utf-8", errors="replace").count(LOCK_MARKER)
+
+
+RUN_KEYS = ("profile", "seed", "concurrency")
+GATED_SECTIONS = ("ingest", "query", "enrichment_lag")
+
+
+def median_report(reports: list[dict]) -> dict:
+    """Combine several runs: the median of every numeric field, the max of lock errors."""
+    first = reports[0]
+    merged = {}
+    for key, value in first.items():
+        values = [r.get(key) for r in reports]
+        if key == "lock_errors":
+            merged[key] = {proc: max(r[key].get(proc, 0) for r in reports) for proc in value}
+        elif key in RUN_KEYS:
+            merged[key] = value
+        elif isinstance(value, dict):
+            merged[key] = median_report(values)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and None not in values:
+            merged[key] = round(statistics.median(values), 3)
+        else:
+            merged[key] = value
+    return merged
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions of `current` against a saved baseline.
+
+    Gates on throughput and p50 latencies; single-run p99s on a shared box are too noisy to gate on.
+    Raises ValueError when the two runs used a different load profile, seed or concurrency.
+    """
+    mismatched = [key for key in RUN_KEYS if current.get(key) != baseline.get(key)]
+    if mismatched:
+        raise ValueError(f"baseline was recorded with a different {', '.join(mismatched)}")
+    regressions = []
+    cur_eps, base_eps = current["ingest_throughput_eps"], baseline["ingest_throughput_eps"]
+    if cur_eps and base_eps and cur_eps < base_eps * (1 - tolerance):
+        regressions.append(f"ingest_throughput_eps {base_eps} -> {cur_eps}")
+    for section in GATED_SECTIONS:
+        cur, base = current[section]["p50_ms"], baseline[section]["p50_ms"]
+        if cur is not None and base is not None and cur > base * (1 + tolerance):
+            regressions.append(f"{section}.p50_ms {base} -> {cur}")
+    for proc, count in current["lock_errors"].items():
+        if count > baseline["lock_errors"].get(proc, 0):
+            regressions.append(f"lock_errors.{proc} {baseline['lock_errors'].get(proc, 0)} -> {count}")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--stores", type=int, default=2)
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--zones", type=int, default=3)
+    p.add_argument("--events-per-zone", type=int, default=40)
+    p.add_argument("--duplicate-rate", type=float, default=0.05)
+    p.add_argument("--outage-rate", type=float, default=0.02)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--runs", type=int, default=3, help="Fresh backend+DB per run; the report holds per-field medians")
+    p.add_argument("--work-dir", default=None, help="Defaults to a fresh temp dir")
+    p.add_argument("--enrich-timeout-s", type=float, default=30.0)
+    p.add_argument("--save-baseline", default=None)
+    p.add_argument("--baseline", default=None)
+    p.add_argument("--tolerance", type=float, default=0.2)
+    return p.parse_args()
+
+
+def run_once(args: argparse.Namespace, schedule: list[dict], work_dir: Path) -> dict:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    db_path = work_dir / "bench.db"
+    db_path.unlink(missing_ok=True)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    backend_log = work_dir / "backend.log"
+    worker_log = work_dir / "worker.log"
+    with backend_log.open("w") as blog, worker_log.open("w") as wlog:
+        backend = subprocess.Popen(
+            [sys.executable, str(ROOT / "backend_api" / "main.py"), "--db", str(db_path),
+             "--media-dir", str(work_dir / "media"), "--host", "127.0.0.1", "--port", str(args.port)],
+            stdout=blog, stderr=subprocess.STDOUT,
+        )
+        worker = None
+        try:
+            wait_healthy(base_url)
+            worker = subprocess.Popen(
+                [sys.executable, str(ROOT / "mm_worker" / "worker.py"), "--db", str(db_path)],
+                stdout=wlog, stderr=subprocess.STDOUT,
+            )
+            report = BenchRun(base_url, str(db_path), args.concurrency, args.seed).run(schedule, args.enrich_timeout_s)
+            report["worker_exited"] = worker.poll() is not None
+        finally:
+            for proc in (worker, backend):
+                if proc is not None:
+                    proc.terminate()
+                    proc.wait(timeout=10)
+
+    report["lock_errors"] = {"backend": count_lock_errors(backend_log), "worker": count_lock_errors(worker_log)}
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    profile = LoadProfile(
+        stores=args.stores,
+        cameras=args.cameras,
+        zones=args.zones,
+        events_per_zone=args.events_per_zone,
+        duplicate_rate=args.duplicate_rate,
+        outage_rate=args.outage_rate,
+    )
+    schedule = LoadGenerator(profile, args.seed).schedule()
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="gym-bench-"))
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(args, schedule, work_dir / f"run_{i}"))
+        print(f"run {i + 1}/{args.runs}: {runs[-1]['ingest_throughput_eps']} eps", file=sys.stderr)
+
+    report = median_report(runs)
+    report["runs"] = args.runs
+    report["profile"] = asdict(profile)
+    report["seed"] = args.seed
+    report["concurrency"] = args.concurrency
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        try:
+            regressions = compare_reports(report, baseline, args.tolerance)
+        except ValueError as exc:
+            sys.exit(f"Cannot compare against {args.baseline}: {exc}")
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark /events/export throughput and backend memory on a large seeded database.
+
+The database keeps the backend's default rollback journal, and events are ingested
+throughout the export so any writer blocking shows up as ingest errors/latency.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend_api.db import make_engine
+from backend_api.models import Base
+from loadgen.bench import latency_summary, wait_healthy
+from loadgen.generator import LoadGenerator, LoadProfile
+from shared.schemas import EventType
+
+
+def seed_db(db_path: Path, rows: int, seed: int, batch: int = 50_000) -> None:
+    engine = make_engine(str(db_path))
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rand = random.Random(seed)
+    types = [t.value for t in EventType]
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        for start in range(0, rows, batch):
+            events, media = [], []
+            for i in range(start, min(rows, start + batch)):
+                event_id = f"bench-{i:09d}"
+                ts = 1_700_000_000.0 + i * 0.5
+                event_type = types[i % len(types)]
+                needs_mm = event_type == EventType.CLEANING_ATTEMPT.value
+                events.append((
+                    event_id, ts, f"store_{i % 7:02d}", f"cam_{i % 32:02d}", "p_0001", f"t_{i % 9999:04d}",
+                    event_type, f"zone_{i % 5:02d}", json.dumps({"dwell_s": round(rand.uniform(0, 120), 2)}),
+                    needs_mm, "DONE" if needs_mm else "SKIPPED", json.dumps([]), json.dumps({}),
+                ))
+                media.append((event_id, "CLIP", f"/media/{event_id}.mp4", ts - 4, ts + 4, json.dumps({})))
+            conn.executemany(
+                "INSERT INTO events (event_id, ts_utc, store_id, camera_id, person_id, track_id, event_type, zone_id,"
+                " metrics, needs_mm, mm_status, mm_labels, stage_ts) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                events,
+            )
+            conn.executemany(
+                "INSERT INTO media (event_id, kind, path, start_ts_utc, end_ts_utc, renditions) VALUES (?,?,?,?,?,?)",
+                media,
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+
+class IngestDuringExport:
+    """Posts fresh events in a loop so the report shows whether the export blocks writers."""
+
+    def __init__(self, base_url: str, seed: int):
+        self.base_url = base_url
+        self.payloads = LoadGenerator(LoadProfile(stores=1, cameras=2, zones=2, events_per_zone=250), seed).schedule()
+        self.latencies: list[float] = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        session = requests.Session()
+        for payload in itertools.cycle(self.payloads):
+            if self._stop.is_set():
+                return
+            payload = {**payload, "event_id": str(uuid.uuid4())}
+            start = time.perf_counter()
+            try:
+                resp = session.post(f"{self.base_url}/ingest/event", json=payload, timeout=30)
+                ok = resp.status_code == 200 and resp.json().get("status") == "created"
+            except requests.RequestException:
+                ok = False
+            self.latencies.append(time.perf_counter() - start)
+            self.errors += 0 if ok else 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        return {**latency_summary(self.latencies), "errors": self.errors}
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--fmt", choices=["ndjson", "csv"], default="ndjson")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--port", type=int, default=8766)
+    p.add_argument("--work-dir", default=None, help="Reuses an existing bench.db with the same row count")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="gym-export-bench-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    db_path = work_dir / f"bench_{args.rows}.db"
+    if not db_path.exists():
+        started = time.perf_counter()
+        seed_db(db_path, args.rows, args.seed)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    backend = subprocess.Popen(
+        [sys.executable, str(ROOT / "backend_api" / "main.py"), "--db", str(db_path),
+         "--media-dir", str(work_dir / "media"), "--host", "127.0.0.1", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(base_url)
+        rss_before = peak_rss_mb(backend.pid)
+        ingest = IngestDuringExport(base_url, args.seed)
+        ingest.start()
+        rows = 0
+        started = time.perf_counter()
+        with requests.get(f"{base_url}/events/export", params={"fmt": args.fmt}, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(chunk_size=1 << 16):
+                if line:
+                    rows += 1
+        elapsed = time.perf_counter() - started
+        ingest_report = ingest.stop()
+        if args.fmt == "csv":
+            rows -= 1  # header
+        report = {
+            "rows": rows,
+            "fmt": args.fmt,
+            "seconds": round(elapsed, 2),
+            "rows_per_s": round(rows / elapsed, 1),
+            "backend_peak_rss_mb_before": rss_before,
+            "backend_peak_rss_mb_after": peak_rss_mb(backend.pid),
+            "ingest_during_export": ingest_report,
+        }
+    finally:
+        backend.terminate()
+        backend.wait(timeout=10)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Deterministic synthetic event traffic for many stores, cameras and zones."""
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import dataclass
+
+from shared.schemas import EventPayload, EventType, MediaPayload
+
+_CYCLE = [
+    EventType.MACHINE_OCCUPIED_START,
+    EventType.MACHINE_OCCUPIED_END,
+    EventType.CLEANING_WINDOW_OPEN,
+    EventType.CLEANING_ATTEMPT,
+]
+
+
+@dataclass
+class LoadProfile:
+    stores: int = 2
+    cameras: int = 4
+    zones: int = 3
+    events_per_zone: int = 40
+    duplicate_rate: float = 0.05
+    outage_rate: float = 0.02
+    outage_len: int = 25
+    base_ts: float = 1_700_000_000.0
+    event_dt_s: float = 2.0
+
+
+class LoadGenerator:
+    """Builds the send schedule an edge fleet would produce, seeded like `DetectorMock`.
+
+    Each zone walks the normal occupancy/cleaning cycle. Some sends are repeated to
+    exercise idempotency, and cameras occasionally go dark, buffer events in their
+    outbox and then replay them as one burst.
+    """
+
+    def __init__(self, profile: LoadProfile, seed: int):
+        self.profile = profile
+        self.rand = random.Random(seed)
+
+    def _event_id(self) -> str:
+        return str(uuid.UUID(int=self.rand.getrandbits(128), version=4))
+
+    def _payload(self, store_id: str, camera_id: str, zone_id: str, step: int) -> dict:
+        event_type = _CYCLE[step % len(_CYCLE)]
+        ts = self.profile.base_ts + step * self.profile.event_dt_s + self.rand.uniform(0, 1)
+        event_id = self._event_id()
+        return EventPayload(
+            event_id=event_id,
+            ts_utc=ts,
+            store_id=store_id,
+            camera_id=camera_id,
+            person_id="p_0001",
+            track_id=f"t_{self.rand.randint(1, 9999):04d}",
+            event_type=event_type,
+            zone_id=zone_id,
+            metrics={"dwell_s": round(self.rand.uniform(0, 120), 2)},
+            media=MediaPayload(path=f"loadgen/{event_id}.mp4", start_ts_utc=ts - 4, end_ts_utc=ts + 4),
+            needs_mm=event_type == EventType.CLEANING_ATTEMPT,
+        ).model_dump(mode="json")
+
+    def schedule(self) -> list[dict]:
+        """Interleaved send order across all cameras, including duplicates and replay bursts."""
+        p = self.profile
+        cameras = [
+            (f"store_{s:02d}", f"store_{s:02d}_cam_{c:02d}")
+            for s in range(p.stores)
+            for c in range(p.cameras)
+        ]
+        outage_left = {cam: 0 for _, cam in cameras}
+        buffered: dict[str, list[dict]] = {cam: [] for _, cam in cameras}
+        sent: list[dict] = []
+
+        for step in range(p.events_per_zone):
+            for store_id, camera_id in cameras:
+                if outage_left[camera_id] == 0 and self.rand.random() < p.outage_rate:
+                    outage_left[camera_id] = p.outage_len
+                for z in range(p.zones):
+                    payload = self._payload(store_id, camera_id, f"{camera_id}_zone_{z:02d}", step)
+                    if outage_left[camera_id]:
+                        buffered[camera_id].append(payload)
+                        continue
+                    sent.append(payload)
+                    if self.rand.random() < p.duplicate_rate:
+                        sent.append(payload)
+                if outage_left[camera_id]:
+                    outage_left[camera_id] -= 1
+                    if outage_left[camera_id] == 0:
+                        sent.extend(buffered[camera_id])
+                        buffered[camera_id] = []
+
+        for camera_id, pending in buffered.items():
+            sent.extend(pending)
+        return sent
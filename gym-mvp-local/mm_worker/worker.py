@@ -15,6 +15,7 @@ if str(ROOT) not in sys.path:
 
 from backend_api.db import get_session_local, make_engine, make_session_factory
 from backend_api.models import Event, Media
+from shared.utils import utc_ts
 
 
 def vlm_mock(event_id: str, clip_path: str, seed: int) -> tuple[str, list[str], float]:
@@ -34,27 +35,40 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+def enrich_pending(session_factory, seed: int, limit: int = 20) -> int:
+    """Enrich one batch of pending events; returns how many were processed."""
+    session = get_session_local(session_factory)
+    try:
+        stmt = select(Event).where(Event.needs_mm.is_(True), Event.mm_status == "PENDING").limit(limit)
+        rows = session.scalars(stmt).all()
+        claimed_ts = utc_ts()
+        for ev in rows:
+            media = session.scalar(select(Media).where(Media.event_id == ev.event_id))
+            clip_path = media.path if media else ""
+            desc, labels, conf = vlm_mock(ev.event_id, clip_path, seed)
+            ev.mm_description = desc
+            ev.mm_labels = labels
+            ev.mm_confidence = conf
+            ev.mm_status = "DONE"
+            ev.stage_ts = {**(ev.stage_ts or {}), "worker_claim": claimed_ts}
+        # Like ingest_commit, enrichment_done is stamped once the flush holds the write lock.
+        session.flush()
+        done_ts = utc_ts()
+        for ev in rows:
+            ev.stage_ts = {**ev.stage_ts, "enrichment_done": done_ts}
+        session.commit()
+        return len(rows)
+    finally:
+        session.close()
+
+
 def main() -> None:
     args = parse_args()
     engine = make_engine(args.db)
     session_factory = make_session_factory(engine)
 
     while True:
-        session = get_session_local(session_factory)
-        try:
-            stmt = select(Event).where(Event.needs_mm.is_(True), Event.mm_status == "PENDING").limit(20)
-            rows = session.scalars(stmt).all()
-            for ev in rows:
-                media = session.scalar(select(Media).where(Media.event_id == ev.event_id))
-                clip_path = media.path if media else ""
-                desc, labels, conf = vlm_mock(ev.event_id, clip_path, args.seed)
-                ev.mm_description = desc
-                ev.mm_labels = labels
-                ev.mm_confidence = conf
-                ev.mm_status = "DONE"
-            session.commit()
-        finally:
-            session.close()
+        enrich_pending(session_factory, args.seed)
         time.sleep(2)
 
 
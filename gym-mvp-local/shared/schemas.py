@@ -14,6 +14,20 @@ class EventType(str, Enum):
     CLEANING_ATTEMPT = "CLEANING_ATTEMPT"
 
 
+# Pipeline stages stamped into `EventPayload.stage_ts`, in the order an event passes through them.
+# `ingest_commit` and `enrichment_done` are stamped inside their write transaction, after SQLite's
+# write lock is acquired and just before the commit.
+LATENCY_STAGES = [
+    "frame_capture",
+    "rule_fire",
+    "clip_exported",
+    "first_send",
+    "ingest_commit",
+    "worker_claim",
+    "enrichment_done",
+]
+
+
 class MediaPayload(BaseModel):
     kind: str = "CLIP"
     path: str
@@ -33,6 +47,7 @@ class EventPayload(BaseModel):
     metrics: dict[str, Any] = Field(default_factory=dict)
     media: MediaPayload
     needs_mm: bool = False
+    stage_ts: dict[str, float] = Field(default_factory=dict)
 
 
 class EventResponse(EventPayload):
@@ -1,6 +1,56 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+from fastapi.testclient import TestClient
+
+import backend_api.main as backend
+from backend_api.db import make_engine, make_session_factory
+from backend_api.media_store import MediaStore
+from backend_api.models import Base
+
+
+def event_payload(event_id: str, **overrides) -> dict:
+    payload = {
+        "event_id": event_id,
+        "ts_utc": 1.0,
+        "store_id": "s",
+        "camera_id": "c",
+        "person_id": "p",
+        "track_id": "t",
+        "event_type": "MACHINE_OCCUPIED_START",
+        "zone_id": "z",
+        "media": {"path": "", "start_ts_utc": 0.0, "end_ts_utc": 2.0},
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def backend_client(tmp_path, monkeypatch):
+    """TestClient over a fresh SQLite DB and media dir; `db_path` is exposed for direct SQL."""
+    db_path = tmp_path / "app.db"
+    engine = make_engine(str(db_path))
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(backend, "SESSION_FACTORY", make_session_factory(engine))
+    monkeypatch.setattr(backend, "MEDIA_STORE", MediaStore(str(tmp_path / "media")))
+    monkeypatch.setattr(backend, "MEDIA_PIPELINE", None)
+    client = TestClient(backend.app)
+    client.db_path = str(db_path)
+    return client
+
+
+@pytest.fixture
+def ingest(backend_client):
+    """Post `event_payload(event_id, **overrides)` and assert it was created."""
+
+    def _ingest(event_id: str, **overrides) -> None:
+        resp = backend_client.post("/ingest/event", json=event_payload(event_id, **overrides))
+        assert resp.json()["status"] == "created"
+
+    return _ingest
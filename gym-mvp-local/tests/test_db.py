@@ -0,0 +1,22 @@
+from sqlalchemy import inspect, text
+
+from backend_api.db import add_missing_columns, make_engine
+from backend_api.models import Base
+
+
+def test_add_missing_columns_upgrades_baseline_schema(tmp_path):
+    engine = make_engine(str(tmp_path / "app.db"))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE events (id INTEGER PRIMARY KEY, event_id VARCHAR, ts_utc FLOAT)"))
+        conn.execute(text("INSERT INTO events (event_id, ts_utc) VALUES ('e1', 1.0)"))
+        conn.execute(text("CREATE TABLE media (id INTEGER PRIMARY KEY, event_id VARCHAR, path VARCHAR)"))
+
+    Base.metadata.create_all(engine)
+    added = add_missing_columns(engine, Base.metadata)
+
+    assert {"events.stage_ts", "media.sha256", "media.renditions"} <= set(added)
+    assert "stage_ts" in {c["name"] for c in inspect(engine).get_columns("events")}
+    assert "ix_media_sha256" in {i["name"] for i in inspect(engine).get_indexes("media")}
+    assert add_missing_columns(engine, Base.metadata) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT event_id, stage_ts FROM events")).one() == ("e1", None)
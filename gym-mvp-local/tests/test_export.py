@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+import backend_api.main as backend
+
+
+@pytest.fixture
+def client(backend_client, ingest, monkeypatch):
+    monkeypatch.setattr(backend, "EXPORT_CHUNK_ROWS", 7)
+    for i in range(25):
+        ingest(
+            f"e{i:02d}",
+            ts_utc=float(i),
+            camera_id=f"cam_{i % 2}",
+            metrics={"dwell_s": i},
+            media={"path": f"/m/e{i:02d}.mp4", "start_ts_utc": i - 1.0, "end_ts_utc": i + 1.0},
+        )
+    return backend_client
+
+
+def test_ndjson_export_streams_all_rows_in_order(client):
+    resp = client.get("/events/export")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["event_id"] for r in rows] == [f"e{i:02d}" for i in range(25)]
+    assert rows[3]["metrics"] == {"dwell_s": 3} and rows[3]["media_path"] == "/m/e03.mp4"
+    assert "ingest_commit" in rows[3]["stage_ts"]
+
+
+def test_export_applies_event_filters(client):
+    resp = client.get("/events/export", params={"camera_id": "cam_1", "start_ts": 10, "end_ts": 20})
+    ids = [json.loads(line)["event_id"] for line in resp.text.splitlines()]
+    assert ids == ["e11", "e13", "e15", "e17", "e19"]
+
+
+def test_csv_export(client):
+    rows = list(csv.DictReader(io.StringIO(client.get("/events/export", params={"fmt": "csv"}).text)))
+    assert len(rows) == 25
+    assert json.loads(rows[0]["metrics"]) == {"dwell_s": 0}
+
+    empty = client.get("/events/export", params={"fmt": "csv", "camera_id": "nope"}).text
+    assert empty.splitlines()[0].startswith("event_id,ts_utc")
+
+
+def test_export_does_not_block_writers_between_chunks(client):
+    chunks = backend._export_chunks(backend.export_stmt(), "ndjson")
+    next(chunks)
+
+    conn = sqlite3.connect(client.db_path, timeout=0)
+    try:
+        conn.execute("UPDATE events SET mm_status = 'DONE'")
+        conn.commit()
+    finally:
+        conn.close()
+    assert sum(chunk.count(b"\n") for chunk in chunks) == 25 - 7
+
+
+def test_export_pages_through_equal_timestamps(client, ingest):
+    for i in range(10):
+        ingest(f"tie{i}", ts_utc=100.0, camera_id="cam_tie")
+    resp = client.get("/events/export", params={"camera_id": "cam_tie"})
+    assert [json.loads(line)["event_id"] for line in resp.text.splitlines()] == [f"tie{i}" for i in range(10)]
@@ -0,0 +1,66 @@
+import backend_api.main as backend
+from backend_api.latency import BUCKETS_S, latency_stats, stage_deltas
+from mm_worker.worker import enrich_pending
+
+
+def test_stage_deltas_skip_missing_stages():
+    deltas = stage_deltas({"frame_capture": 10.0, "rule_fire": 10.02, "first_send": 10.5, "ingest_commit": 13.5})
+    assert deltas.keys() == {"rule_fire", "first_send", "ingest_commit", "end_to_end"}
+    assert round(deltas["first_send"], 3) == 0.48
+    assert deltas["end_to_end"] == 3.5
+
+
+def test_negative_deltas_are_counted_not_clamped():
+    rows = [
+        ("cam_a", {"frame_capture": 10.0, "first_send": 10.5, "ingest_commit": 10.2}),
+        ("cam_a", {"frame_capture": 10.0, "ingest_commit": 10.1}),
+    ]
+    assert round(stage_deltas(rows[0][1])["ingest_commit"], 3) == -0.3
+    stats = latency_stats(rows)["stages"]["ingest_commit"]
+    assert stats["count"] == 2 and stats["negative"] == 1
+    assert sum(stats["histogram"]) == 1
+
+
+def test_latency_stats_per_camera_histograms():
+    rows = [
+        ("cam_a", {"frame_capture": 0.0, "ingest_commit": 0.2}),
+        ("cam_a", {"frame_capture": 0.0, "ingest_commit": 20.0}),
+        ("cam_b", {"frame_capture": 0.0, "ingest_commit": 0.03}),
+        ("cam_b", None),
+    ]
+    stats = latency_stats(rows)
+    assert stats["stages"]["ingest_commit"]["count"] == 3
+    assert sum(stats["stages"]["ingest_commit"]["histogram"]) == 3
+    assert len(stats["stages"]["ingest_commit"]["histogram"]) == len(BUCKETS_S) + 1
+    assert stats["cameras"]["cam_a"]["end_to_end"]["max_s"] == 20.0
+    assert stats["cameras"]["cam_b"]["ingest_commit"]["p50_s"] == 0.03
+
+
+def test_ingest_stamps_commit_and_keeps_edge_stages(backend_client, ingest):
+    ingest("e1", camera_id="cam_01", stage_ts={"frame_capture": 1.0, "first_send": 1.5})
+
+    stage_ts = backend_client.get("/events/e1").json()["stage_ts"]
+    assert stage_ts["frame_capture"] == 1.0 and "ingest_commit" in stage_ts
+    stats = backend_client.get("/stats/latency", params={"camera_id": "cam_01"}).json()
+    assert set(stats["cameras"]) == {"cam_01"}
+    assert stats["stages"]["ingest_commit"]["count"] == 1
+
+
+def test_worker_stamps_survive_ingest(backend_client, ingest, monkeypatch):
+    # A worker pass while ingest is stamping ingest_commit must not race the stamp.
+    real_utc_ts = backend.utc_ts
+
+    def worker_then_stamp():
+        enrich_pending(backend.SESSION_FACTORY, seed=1)
+        return real_utc_ts()
+
+    monkeypatch.setattr(backend, "utc_ts", worker_then_stamp)
+    ingest("e1", needs_mm=True, stage_ts={"frame_capture": 1.0})
+    monkeypatch.setattr(backend, "utc_ts", real_utc_ts)
+    assert enrich_pending(backend.SESSION_FACTORY, seed=1) == 1
+
+    event = backend_client.get("/events/e1").json()
+    assert event["mm_status"] == "DONE"
+    stage_ts = event["stage_ts"]
+    assert set(stage_ts) == {"frame_capture", "ingest_commit", "worker_claim", "enrichment_done"}
+    assert stage_ts["ingest_commit"] <= stage_ts["worker_claim"] <= stage_ts["enrichment_done"]
@@ -0,0 +1,61 @@
+import pytest
+
+from loadgen.bench import compare_reports, median_report, percentile
+from loadgen.generator import LoadGenerator, LoadProfile
+
+
+def test_schedule_is_deterministic_with_duplicates_and_replays():
+    profile = LoadProfile(stores=2, cameras=2, zones=2, events_per_zone=30, duplicate_rate=0.1, outage_rate=0.1, outage_len=5)
+    a = LoadGenerator(profile, seed=7).schedule()
+    b = LoadGenerator(profile, seed=7).schedule()
+    assert a == b
+
+    ids = [p["event_id"] for p in a]
+    assert len(set(ids)) == 2 * 2 * 2 * 30
+    assert len(ids) > len(set(ids))
+    # Outage replays arrive after newer events from other cameras.
+    assert any(a[i]["ts_utc"] < a[i - 1]["ts_utc"] - profile.event_dt_s for i in range(1, len(a)))
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) is None
+    assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.0
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_compare_reports_flags_regressions():
+    def report(eps, p50, locks):
+        lat = {"p50_ms": p50, "p99_ms": 10 * p50}
+        return {
+            "profile": {"stores": 2},
+            "seed": 42,
+            "concurrency": 8,
+            "ingest_throughput_eps": eps,
+            "ingest": lat,
+            "query": lat,
+            "enrichment_lag": lat,
+            "lock_errors": {"backend": locks},
+        }
+
+    base = report(100.0, 50.0, 0)
+    assert compare_reports(report(95.0, 55.0, 0), base, tolerance=0.2) == []
+    assert len(compare_reports(report(70.0, 80.0, 2), base, tolerance=0.2)) == 5
+
+
+def test_compare_reports_refuses_different_profiles():
+    lat = {"p50_ms": 1.0}
+    base = {"profile": {"stores": 2}, "seed": 42, "concurrency": 8, "ingest_throughput_eps": 100.0,
+            "ingest": lat, "query": lat, "enrichment_lag": lat, "lock_errors": {}}
+    with pytest.raises(ValueError, match="profile"):
+        compare_reports({**base, "profile": {"stores": 1}}, base, tolerance=0.2)
+
+
+def test_median_report_over_runs():
+    runs = [
+        {"ingest_throughput_eps": eps, "ingest": {"p50_ms": p50, "p99_ms": None}, "lock_errors": {"backend": locks}, "seed": 42}
+        for eps, p50, locks in [(100.0, 40.0, 0), (80.0, 900.0, 2), (90.0, 45.0, 0)]
+    ]
+    merged = median_report(runs)
+    assert merged["ingest_throughput_eps"] == 90.0 and merged["ingest"]["p50_ms"] == 45.0
+    assert merged["ingest"]["p99_ms"] is None
+    assert merged["lock_errors"] == {"backend": 2} and merged["seed"] == 42
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+import backend_api.main as backend
+import backend_api.media_pipeline as media_pipeline
+from backend_api.media_pipeline import THUMB_WIDTH, MediaPipeline, process_clip, store_renditions
+
+
+def _write_clip(path, frames=24, size=(320, 240)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 8, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+@pytest.fixture
+def client(backend_client, ingest, tmp_path):
+    clip = tmp_path / "clip.mp4"
+    _write_clip(clip)
+    ingest("e1", media={"path": str(clip), "start_ts_utc": 0.0, "end_ts_utc": 2.0})
+    return backend_client
+
+
+def test_process_clip_writes_poster_and_sprite(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    _write_clip(clip)
+    out = process_clip(str(clip), str(tmp_path / "derived"))
+
+    poster = cv2.imread(out["poster_path"])
+    assert poster.shape[:2] == (240, 320)
+    sprite = cv2.imread(out["thumbs_path"])
+    layout = out["thumbs"]
+    assert layout["count"] == 10 and layout["columns"] == 5
+    assert sprite.shape[:2] == (2 * layout["tile_height"], 5 * THUMB_WIDTH)
+
+
+def test_same_clip_at_two_paths_is_processed_once(tmp_path, monkeypatch):
+    _write_clip(tmp_path / "edge.mp4")
+    (tmp_path / "blob.mp4").write_bytes((tmp_path / "edge.mp4").read_bytes())
+    derived = tmp_path / "derived"
+
+    first = process_clip(str(tmp_path / "edge.mp4"), str(derived))
+    monkeypatch.setattr(media_pipeline, "extract_stills", lambda *args: pytest.fail("clip processed twice"))
+    assert process_clip(str(tmp_path / "blob.mp4"), str(derived)) == first
+    assert sorted(p.name for p in derived.iterdir()) == sorted(
+        f"{first['sha256']}{suffix}" for suffix in (".json", ".poster.jpg", ".thumbs.jpg")
+    )
+
+
+def test_process_clip_without_frames_skips_stills(tmp_path):
+    (tmp_path / "empty.mp4").write_bytes(b"")
+    assert set(process_clip(str(tmp_path / "empty.mp4"), str(tmp_path / "derived"))) == {"sha256"}
+
+
+def test_poster_and_thumbs_endpoints(client, tmp_path):
+    assert client.get("/media/e1/poster").status_code == 404
+
+    renditions = process_clip(str(tmp_path / "clip.mp4"), str(backend.MEDIA_STORE.derived_dir))
+    store_renditions(backend.SESSION_FACTORY, "e1", renditions)
+
+    poster = client.get("/media/e1/poster")
+    assert poster.status_code == 200 and poster.headers["content-type"] == "image/jpeg"
+    assert "max-age" in poster.headers["cache-control"] and poster.headers["etag"]
+
+    thumbs = client.get("/media/e1/thumbs", headers={"Range": "bytes=0-99"})
+    assert thumbs.status_code == 206 and len(thumbs.content) == 100
+    assert thumbs.headers["x-thumbs-count"] == "10"
+    assert thumbs.headers["x-thumbs-tile"] == f"{THUMB_WIDTH}x{renditions['thumbs']['tile_height']}"
+
+
+def test_media_prefers_web_rendition(client, tmp_path):
+    original = client.get("/media/e1")
+    assert original.headers["cache-control"] == "no-cache"
+    assert client.get("/media/e1", headers={"If-None-Match": original.headers["etag"]}).status_code == 304
+
+    web = tmp_path / "web.mp4"
+    web.write_bytes(b"web-version")
+    store_renditions(backend.SESSION_FACTORY, "e1", {"web_path": str(web)})
+    resp = client.get("/media/e1", headers={"Range": "bytes=4-", "If-None-Match": original.headers["etag"]})
+    assert resp.status_code == 206 and resp.content == b"version"
+    assert "max-age" in resp.headers["cache-control"]
+
+
+def test_pipeline_records_renditions_from_process_pool(client, tmp_path):
+    pipeline = MediaPipeline(backend.SESSION_FACTORY, str(backend.MEDIA_STORE.derived_dir), max_workers=1)
+    try:
+        pipeline.submit("e1", str(tmp_path / "clip.mp4")).result(timeout=60)
+    finally:
+        pipeline.pool.shutdown(wait=True)
+    assert client.get("/media/e1/poster").status_code == 200
+
+
+def test_upload_of_rendered_clip_is_not_reprocessed(client, tmp_path, monkeypatch):
+    clip = (tmp_path / "clip.mp4").read_bytes()
+    renditions = process_clip(str(tmp_path / "clip.mp4"), str(backend.MEDIA_STORE.derived_dir))
+    store_renditions(backend.SESSION_FACTORY, "e1", renditions)
+
+    scheduled = []
+    monkeypatch.setattr(backend, "_schedule_renditions", lambda *args: scheduled.append(args))
+    client.put("/media/e1/upload", params={"offset": 0}, files={"chunk": ("c.mp4", clip)})
+    assert client.post("/media/e1/upload/complete", data={"sha256": renditions["sha256"]}).status_code == 200
+    assert scheduled == []
+
+
+def test_renditions_only_scheduled_for_clips_in_media_dir(backend_client, ingest, tmp_path, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(backend, "MEDIA_PIPELINE", SimpleNamespace(submit=lambda *args: submitted.append(args)))
+    inside = backend.MEDIA_STORE.root / "edge" / "clip.mp4"
+    inside.parent.mkdir()
+    inside.write_bytes(b"clip")
+    (tmp_path / "outside.mp4").write_bytes(b"clip")
+    (backend.MEDIA_STORE.root / "link.mp4").symlink_to(tmp_path / "outside.mp4")
+
+    paths = ["/dev/zero", str(tmp_path / "outside.mp4"), str(backend.MEDIA_STORE.root / "link.mp4"),
+             str(backend.MEDIA_STORE.root / ".." / "outside.mp4"), str(inside)]
+    for i, path in enumerate(paths):
+        ingest(f"e{i}", media={"path": path, "start_ts_utc": 0.0, "end_ts_utc": 2.0})
+    assert submitted == [("e4", str(inside))]
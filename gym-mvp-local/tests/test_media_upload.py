@@ -0,0 +1,73 @@
+import hashlib
+
+import pytest
+
+import backend_api.main as backend
+
+
+@pytest.fixture
+def client(backend_client, ingest):
+    for event_id in ("e1", "e2"):
+        ingest(event_id, media={"path": "/edge/only/clip.mp4", "start_ts_utc": 0.0, "end_ts_utc": 2.0})
+    return backend_client
+
+
+def _put(client, event_id, offset, data):
+    return client.put(f"/media/{event_id}/upload", params={"offset": offset}, files={"chunk": ("c.mp4", data)})
+
+
+def test_resumable_upload_then_dedupe(client):
+    clip = bytes(range(256)) * 100
+    sha = hashlib.sha256(clip).hexdigest()
+
+    assert client.post("/media/e1/upload", data={"sha256": sha}).json() == {"status": "pending", "event_id": "e1", "offset": 0}
+    assert _put(client, "e1", 0, clip[:10000]).json()["offset"] == 10000
+    # Interrupted client resumes from the server-side offset; wrong offsets are rejected.
+    assert client.post("/media/e1/upload", data={"sha256": sha}).json()["offset"] == 10000
+    resp = _put(client, "e1", 0, clip[:10000])
+    assert resp.status_code == 409 and resp.json()["detail"]["offset"] == 10000
+    assert _put(client, "e1", 10000, clip[10000:]).json()["offset"] == len(clip)
+    assert client.post("/media/e1/upload/complete", data={"sha256": sha}).json()["status"] == "stored"
+    assert client.get("/media/e1").content == clip
+
+    assert client.post("/media/e2/upload", data={"sha256": sha}).json()["status"] == "linked"
+    assert client.get("/media/e2").content == clip
+    assert len(list(backend.MEDIA_STORE.blob_dir.iterdir())) == 1
+
+
+def test_hash_mismatch_discards_partial(client):
+    _put(client, "e1", 0, b"abc")
+    resp = client.post("/media/e1/upload/complete", data={"sha256": "0" * 64})
+    assert resp.status_code == 422
+    assert backend.MEDIA_STORE.offset("e1") == 0
+
+
+def test_upload_requires_ingested_event(client):
+    assert client.post("/media/missing/upload", data={"sha256": "0" * 64}).status_code == 404
+    assert _put(client, "missing", 0, b"abc").status_code == 404
+    assert not backend.MEDIA_STORE.partial_path("missing").exists()
+
+
+@pytest.mark.parametrize("sha256", ["../../secret", "A" * 64, "0" * 63, "0" * 64 + "/"])
+def test_sha256_must_be_lowercase_hex(client, tmp_path, sha256):
+    (tmp_path / "secret.mp4").write_bytes(b"private")
+
+    assert client.post("/media/e1/upload", data={"sha256": sha256}).status_code == 422
+    assert client.post("/media/e1/upload/complete", data={"sha256": sha256}).status_code == 422
+    assert client.get("/media/e1").status_code == 404
+
+
+def test_start_upload_links_only_existing_blob_once(client, monkeypatch):
+    clip = b"clip-bytes"
+    sha = hashlib.sha256(clip).hexdigest()
+    _put(client, "e1", 0, clip)
+    client.post("/media/e1/upload/complete", data={"sha256": sha})
+
+    scheduled = []
+    monkeypatch.setattr(backend, "_schedule_renditions", lambda *args: scheduled.append(args))
+    assert client.post("/media/e1/upload", data={"sha256": sha}).json()["status"] == "linked"
+    assert scheduled == []
+
+    # A row still pointing at a blob that was removed must be re-uploaded, not re-linked.
+    backend.MEDIA_STORE.blob_path(sha).unlink()
+    assert client.post("/media/e1/upload", data={"sha256": sha}).json()["status"] == "pending"
@@ -0,0 +1,72 @@
+from edge_service.event_rules import EventRulesEngine, RuleConfig
+from edge_service.replay_rules import _event_times, replay_log, summarize
+from edge_service.track_log import TrackLogWriter, read_track_log
+
+
+def _frames():
+    for i in range(200):
+        ts = i * 0.1
+        tracks = ["t_0001"] if 10 <= i < 80 else []
+        yield ts, "z1", tracks, i % 7 == 0
+        yield ts, "z2", ["t_0002", "t_0003"] if i > 150 else [], False
+
+
+def test_roundtrip_across_chunks(tmp_path):
+    path = tmp_path / "cam.gtl"
+    with TrackLogWriter(str(path), chunk_rows=33) as writer:
+        for frame in _frames():
+            writer.append(*frame)
+
+    cols = read_track_log(str(path))
+    assert list(cols.iter_frames()) == [(ts, z, t, m) for ts, z, t, m in _frames()]
+
+
+def test_truncated_trailing_chunk_is_ignored(tmp_path):
+    path = tmp_path / "cam.gtl"
+    with TrackLogWriter(str(path), chunk_rows=100) as writer:
+        for frame in _frames():
+            writer.append(*frame)
+    raw = path.read_bytes()
+    path.write_bytes(raw[:-10])
+
+    assert len(read_track_log(str(path))) == 300
+
+
+def test_replay_matches_live_engine(tmp_path):
+    cfg = RuleConfig(occupy_start_s=2, occupy_end_s=1, cleaning_window_s=5)
+    path = tmp_path / "cam.gtl"
+    live = []
+    engine = EventRulesEngine(cfg)
+    with TrackLogWriter(str(path)) as writer:
+        for ts, zone_id, tracks, motion in _frames():
+            writer.append(ts, zone_id, tracks, motion)
+            live.extend((ts, e.zone_id, e.event_type.value, e.track_id) for e in engine.process(ts, zone_id, tracks, motion))
+
+    assert replay_log(read_track_log(str(path)), cfg) == live
+
+
+def test_summarize_reports_diff_against_baseline():
+    base = {("cam", "z1", "MACHINE_OCCUPIED_START"): [1.0], ("cam", "z1", "MACHINE_OCCUPIED_END"): [9.0]}
+    cand = {("cam", "z1", "MACHINE_OCCUPIED_START"): [1.5, 100.0]}
+
+    out = summarize(RuleConfig(), cand, base)
+    assert out["counts"] == {"MACHINE_OCCUPIED_END": 0, "MACHINE_OCCUPIED_START": 2}
+    assert out["count_delta"] == {"MACHINE_OCCUPIED_END": -1, "MACHINE_OCCUPIED_START": 1}
+    assert (out["added"], out["removed"], out["shifted"]) == (1, 1, 1)
+    assert out["shift_s"] == {"MACHINE_OCCUPIED_START": {"mean": 0.5, "min": 0.5, "max": 0.5}}
+
+
+def test_timing_only_change_is_reported_as_shift(tmp_path):
+    path = tmp_path / "cam.gtl"
+    with TrackLogWriter(str(path)) as writer:
+        for frame in _frames():
+            writer.append(*frame)
+    logs = {"cam": read_track_log(str(path))}
+    base_cfg = RuleConfig(occupy_start_s=3, occupy_end_s=1, cleaning_window_s=5)
+    cand_cfg = RuleConfig(occupy_start_s=2, occupy_end_s=1, cleaning_window_s=5)
+
+    out = summarize(cand_cfg, _event_times(logs, cand_cfg), _event_times(logs, base_cfg))
+    assert out["count_delta"] == {}
+    assert (out["added"], out["removed"]) == (0, 0)
+    assert out["shifted"] == 2
+    assert out["shift_s"]["MACHINE_OCCUPIED_START"]["mean"] == -1.0
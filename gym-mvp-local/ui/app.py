@@ -42,4 +42,7 @@ if selected:
     st.subheader("Event detail")
     st.json(detail)
     st.markdown(f"**MM Description:** {detail.get('mm_description')}")
+    thumbs = requests.get(f"{API_BASE}/media/{selected}/thumbs", timeout=3)
+    if thumbs.status_code == 200:
+        st.image(thumbs.content, caption="Clip preview")
     st.video(f"{API_BASE}/media/{selected}")